@@ -0,0 +1,116 @@
+# --- GENERACIÓN DE BOLETAS / FACTURAS EN PDF (ReportLab) ---
+# Vive en su propio módulo para poder correr en un ProcessPoolExecutor:
+# recibe solo datos simples (dict) y devuelve los bytes del PDF, sin tocar la BD.
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+
+def nombre_archivo_pdf(datos: dict) -> str:
+    if datos["tipo"] == "boleta":
+        return f"Boleta_Chocomania_B{datos['pedido_id']:06d}.pdf"
+    return f"Factura_Chocomania_F{datos['pedido_id']:06d}.pdf"
+
+
+def renderizar_documento_pdf(datos: dict) -> bytes:
+    """
+    Arma la boleta/factura de un pedido.
+    'datos' trae: pedido_id, fecha, estado, total, tipo ("boleta"/"factura"), rut, razon_social
+    y cliente (nombre, email, direccion, telefono).
+    """
+    pedido_id = datos["pedido_id"]
+    total = datos["total"]
+    cliente = datos["cliente"]
+    es_factura = datos["tipo"] == "factura"
+
+    buffer = BytesIO()
+    pdf = SimpleDocTemplate(buffer, pagesize=letter)
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#7B3F00'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+
+    # Contenido
+    story = []
+
+    # Título
+    story.append(Paragraph("CHOCOMANÍA", title_style))
+    story.append(Paragraph("Chocolatería Artesanal", styles['Normal']))
+    story.append(Spacer(1, 0.3*inch))
+
+    # Tipo de documento
+    doc_title = "FACTURA ELECTRÓNICA" if es_factura else "BOLETA ELECTRÓNICA"
+    story.append(Paragraph(doc_title, styles['Heading2']))
+    story.append(Paragraph(f"N° B001-{pedido_id:06d}", styles['Normal']))
+    story.append(Spacer(1, 0.3*inch))
+
+    # Datos del cliente
+    data = [
+        ['DATOS DEL CLIENTE', ''],
+        ['Nombre:', cliente["nombre"] or cliente["email"]],
+        ['Email:', cliente["email"]],
+        ['Dirección:', cliente["direccion"] or 'No especificada'],
+        ['Teléfono:', cliente["telefono"] or 'No especificado'],
+        ['', ''],
+        ['DETALLES DEL PEDIDO', ''],
+        ['N° Pedido:', f'#{pedido_id}'],
+        ['Fecha:', datos["fecha"]],
+        ['Estado:', datos["estado"]],
+    ]
+
+    # Si es factura, agregar datos tributarios
+    if es_factura and datos["rut"]:
+        data.insert(2, ['RUT:', datos["rut"]])
+        data.insert(3, ['Razón Social:', datos["razon_social"] or ''])
+
+    # Calcular desglose
+    if es_factura:
+        neto = round(total / 1.19)
+        iva = total - neto
+        data.extend([
+            ['', ''],
+            ['DESGLOSE', ''],
+            ['Neto:', f'${neto:,.0f}'],
+            ['IVA (19%):', f'${iva:,.0f}'],
+            ['TOTAL:', f'${total:,.0f}'],
+        ])
+    else:
+        data.extend([
+            ['', ''],
+            ['TOTAL:', f'${total:,.0f}'],
+        ])
+
+    # Crear tabla
+    table = Table(data, colWidths=[2.5*inch, 4*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7B3F00')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+    ]))
+
+    story.append(table)
+    story.append(Spacer(1, 0.5*inch))
+    story.append(Paragraph("Este documento es válido para todos los efectos tributarios.", styles['Italic']))
+    story.append(Paragraph("¡Gracias por tu compra!", styles['Normal']))
+
+    # Construir PDF
+    pdf.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,86 @@
+# estres_logins.py
+# Prueba de carga de PoolHashing: mientras muchos logins concurrentes ocupan bcrypt,
+# se mide la latencia del catálogo. Como bcrypt corre fuera del event loop, ninguna
+# consulta al catálogo debería esperar lo que tarda un hash completo.
+# Por defecto usa una BD SQLite temporal; con DATABASE_URL exportado corre contra
+# ese motor (crea sus propios datos de prueba y los borra al final).
+#
+#   python estres_logins.py [logins] [consultas_catalogo]
+import asyncio
+import os
+import sys
+import tempfile
+from collections import Counter
+from time import perf_counter
+
+if "DATABASE_URL" not in os.environ:
+    carpeta = tempfile.mkdtemp(prefix="estres_logins_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(carpeta, 'logins.db')}"
+
+import httpx
+
+from main import app, SessionLocal, UsuarioDB, ProductoDB, Roles, hashear_contraseña, pool_hashing
+from migraciones import actualizar
+
+LOGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+CONSULTAS = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+EMAIL, CLAVE = "estres.login@chocomania.cl", "clave-de-prueba"
+
+def crear_datos() -> float:
+    """Usuario y productos de prueba. Devuelve lo que tarda un hash de bcrypt (segundos)."""
+    inicio = perf_counter()
+    hash_clave = hashear_contraseña(CLAVE)
+    segundos_hash = perf_counter() - inicio
+    with SessionLocal() as db:
+        db.add(UsuarioDB(email=EMAIL, hashed_password=hash_clave, rol=Roles.cliente))
+        db.add_all([ProductoDB(nombre=f"Estrés login {i}", precio=1000, tipo="Prueba", stock=10, activo=True) for i in range(20)])
+        db.commit()
+    return segundos_hash
+
+def borrar_datos():
+    with SessionLocal() as db:
+        db.query(UsuarioDB).filter(UsuarioDB.email == EMAIL).delete(synchronize_session=False)
+        db.query(ProductoDB).filter(ProductoDB.nombre.like("Estrés login %")).delete(synchronize_session=False)
+        db.commit()
+
+async def latencias_catalogo(cliente: httpx.AsyncClient) -> list:
+    latencias = []
+    for _ in range(CONSULTAS):
+        inicio = perf_counter()
+        respuesta = await cliente.get("/productos/")
+        latencias.append((perf_counter() - inicio) * 1000)
+        assert respuesta.status_code == 200, respuesta.text
+        await asyncio.sleep(0.02)
+    return sorted(latencias)
+
+async def login(cliente: httpx.AsyncClient) -> int:
+    respuesta = await cliente.post("/token", data={"username": EMAIL, "password": CLAVE})
+    return respuesta.status_code
+
+def resumen(latencias: list) -> str:
+    return f"p50 {latencias[len(latencias) // 2]:6.1f} ms | máx {latencias[-1]:6.1f} ms"
+
+async def correr(segundos_hash: float) -> bool:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://estres") as cliente:
+        await cliente.get("/productos/")  # calienta la caché del catálogo
+        sin_carga = await latencias_catalogo(cliente)
+        inicio = perf_counter()
+        con_carga, *estados = await asyncio.gather(latencias_catalogo(cliente), *[login(cliente) for _ in range(LOGINS)])
+        duracion = perf_counter() - inicio
+    print(f"   catálogo sin carga:        {resumen(sin_carga)}")
+    print(f"   catálogo con {LOGINS:>3} logins:   {resumen(con_carga)}")
+    print(f"   logins: {dict(Counter(estados))} en {duracion:.1f} s | un hash bcrypt: {segundos_hash * 1000:.0f} ms")
+    print(f"   pool de hashing: {pool_hashing.metricas()}")
+    return con_carga[-1] < segundos_hash * 1000
+
+actualizar()
+segundos_hash = crear_datos()
+try:
+    print(f"🧪 {LOGINS} logins concurrentes mientras se consulta el catálogo {CONSULTAS} veces...")
+    if not asyncio.run(correr(segundos_hash)):
+        print("❌ Alguna consulta al catálogo esperó más que un hash completo: bcrypt está bloqueando el event loop")
+        sys.exit(1)
+    print("✅ El catálogo sigue respondiendo mientras bcrypt trabaja")
+finally:
+    borrar_datos()
@@ -0,0 +1,82 @@
+# estres_stock.py
+# Prueba de estrés de reservar_stock: muchos hilos compran a la vez los mismos
+# productos y se verifica que nunca se venda más de lo que hay (sin sobreventa).
+# Por defecto usa una BD SQLite temporal; con DATABASE_URL exportado corre contra
+# ese motor (crea sus propios productos de prueba y los borra al final).
+#
+#   python estres_stock.py [hilos] [stock]
+import os
+import sys
+import tempfile
+import threading
+
+if "DATABASE_URL" not in os.environ:
+    carpeta = tempfile.mkdtemp(prefix="estres_stock_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(carpeta, 'estres.db')}"
+
+from main import SessionLocal, ProductoDB, reservar_stock
+from migraciones import actualizar
+
+HILOS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+STOCK = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+def crear_productos() -> list:
+    with SessionLocal() as db:
+        productos = [
+            ProductoDB(nombre=f"Estrés {i}", precio=1000, tipo="Prueba", stock=STOCK, activo=True)
+            for i in (1, 2)
+        ]
+        db.add_all(productos)
+        db.commit()
+        return [p.id for p in productos]
+
+def stock_actual(ids: list) -> list:
+    with SessionLocal() as db:
+        return [db.query(ProductoDB.stock).filter(ProductoDB.id == pid).scalar() for pid in ids]
+
+def comprar(ids: list) -> bool:
+    """Un pedido de 1 unidad de cada producto, igual que al confirmar un carrito."""
+    with SessionLocal() as db:
+        if reservar_stock(db, {pid: 1 for pid in ids}):
+            db.commit()
+            return True
+        db.rollback()
+        return False
+
+def correr(ids: list):
+    barrera = threading.Barrier(HILOS)
+    exitos, errores = [], []
+
+    def hilo():
+        barrera.wait()  # todos parten juntos para maximizar la contención
+        try:
+            if comprar(ids):
+                exitos.append(1)
+        except Exception as e:
+            errores.append(f"{type(e).__name__}: {e}")
+
+    hilos = [threading.Thread(target=hilo) for _ in range(HILOS)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return len(exitos), errores
+
+actualizar()
+ids = crear_productos()
+try:
+    print(f"🧪 {HILOS} hilos comprando productos {ids} con stock {STOCK}...")
+    vendidos, errores = correr(ids)
+    finales = stock_actual(ids)
+    print(f"   reservas exitosas: {vendidos} | stock final: {finales} | errores: {len(errores)}")
+    for error in errores[:5]:
+        print(f"   ⚠️ {error}")
+    esperados = min(HILOS, STOCK)
+    if vendidos != esperados or finales != [STOCK - esperados] * len(ids) or errores:
+        print(f"❌ Sobreventa o reservas perdidas: se esperaban {esperados} reservas y stock {STOCK - esperados}")
+        sys.exit(1)
+    print("✅ Sin sobreventa")
+finally:
+    with SessionLocal() as db:
+        db.query(ProductoDB).filter(ProductoDB.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
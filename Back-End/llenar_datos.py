@@ -1,9 +1,10 @@
 # llenar_datos.py
-from main import SessionLocal, ProductoDB, PromocionDB, Base, engine
+from main import SessionLocal, ProductoDB, PromocionDB
+from migraciones import actualizar
 from datetime import datetime, timedelta, timezone
 
-# 1. Crear tablas si no existen
-Base.metadata.create_all(bind=engine)
+# 1. Crear/actualizar las tablas con las migraciones pendientes
+actualizar()
 
 # ✅ 2. Lista de productos ACTUALIZADA (con stock de 100 y tipos correctos)
 productos_iniciales = [
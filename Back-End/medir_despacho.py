@@ -0,0 +1,96 @@
+# medir_despacho.py
+# Mide cuántas sentencias SQL hace GET /pedidos/pendientes/despacho a medida que crece
+# la cantidad de pedidos despachados: debe ser la misma con 10 que con 1000 (sin N+1).
+# Por defecto usa una BD SQLite temporal; con DATABASE_URL exportado corre contra
+# ese motor (crea sus propios datos de prueba y los borra al final).
+#
+#   python medir_despacho.py [cantidades...]     (por defecto: 10 100 1000)
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+if "DATABASE_URL" not in os.environ:
+    carpeta = tempfile.mkdtemp(prefix="medir_despacho_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(carpeta, 'despacho.db')}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import (
+    app, engine, SessionLocal, UsuarioDB, PedidoDB, SeguimientoDB, Roles, EstadoPedido,
+    crear_access_token, claims_para_token,
+)
+from migraciones import actualizar
+
+CANTIDADES = [int(n) for n in sys.argv[1:]] or [10, 100, 1000]
+
+def crear_usuarios() -> dict:
+    with SessionLocal() as db:
+        usuarios = {
+            "admin": UsuarioDB(email="medir.admin@chocomania.cl", hashed_password="-", rol=Roles.administrador),
+            "repartidor": UsuarioDB(email="medir.rep@chocomania.cl", hashed_password="-", rol=Roles.repartidor),
+            "cliente": UsuarioDB(email="medir.cli@chocomania.cl", hashed_password="-", rol=Roles.cliente,
+                                 nombre="Cliente Prueba", direccion="Av. Siempre Viva 742", telefono="123"),
+        }
+        db.add_all(usuarios.values())
+        db.commit()
+        return {rol: (u.id, crear_access_token(claims_para_token(u))) for rol, u in usuarios.items()}
+
+def agregar_pedidos(cliente_id: int, cantidad: int):
+    """Pedidos despachados: la mitad asignados al repartidor de prueba, el resto a otro."""
+    with SessionLocal() as db:
+        pedidos = [PedidoDB(usuario_id=cliente_id, total=5000, estado=EstadoPedido.despachado) for _ in range(cantidad)]
+        db.add_all(pedidos)
+        db.flush()
+        db.add_all([
+            SeguimientoDB(pedido_id=p.id, repartidor_asignado="medir.rep@chocomania.cl" if i % 2 == 0 else "otro")
+            for i, p in enumerate(pedidos)
+        ])
+        db.commit()
+
+def medir(cliente: TestClient, token: str) -> tuple:
+    """(sentencias SQL, pedidos devueltos, ms) de una petición, con el principal ya en caché."""
+    headers = {"Authorization": f"Bearer {token}"}
+    cliente.get("/pedidos/pendientes/despacho", headers=headers)
+    sentencias = []
+    contar = lambda *args, **kwargs: sentencias.append(args[2])
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        inicio = perf_counter()
+        respuesta = cliente.get("/pedidos/pendientes/despacho", headers=headers)
+        ms = (perf_counter() - inicio) * 1000
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    assert respuesta.status_code == 200, respuesta.text
+    return len(sentencias), len(respuesta.json()), ms
+
+def borrar_datos(usuarios: dict):
+    with SessionLocal() as db:
+        cliente_id = usuarios["cliente"][0]
+        pedidos = db.query(PedidoDB.id).filter(PedidoDB.usuario_id == cliente_id)
+        db.query(SeguimientoDB).filter(SeguimientoDB.pedido_id.in_(pedidos.scalar_subquery())).delete(synchronize_session=False)
+        db.query(PedidoDB).filter(PedidoDB.usuario_id == cliente_id).delete(synchronize_session=False)
+        db.query(UsuarioDB).filter(UsuarioDB.id.in_([u[0] for u in usuarios.values()])).delete(synchronize_session=False)
+        db.commit()
+
+actualizar()
+usuarios = crear_usuarios()
+cliente = TestClient(app)  # sin el startup de la app: los trabajos de fondo no ensucian el conteo
+try:
+    print(f"🧪 GET /pedidos/pendientes/despacho con {', '.join(map(str, CANTIDADES))} pedidos despachados")
+    conteos = set()
+    total = 0
+    for cantidad in sorted(CANTIDADES):
+        agregar_pedidos(usuarios["cliente"][0], cantidad - total)
+        total = cantidad
+        for rol in ("admin", "repartidor"):
+            sentencias, devueltos, ms = medir(cliente, usuarios[rol][1])
+            conteos.add(sentencias)
+            print(f"   {cantidad:>6} pedidos | {rol:<10} | {devueltos:>6} devueltos | {sentencias} sentencia(s) SQL | {ms:7.1f} ms")
+    if len(conteos) != 1:
+        print(f"❌ La cantidad de sentencias cambia con la cantidad de pedidos: {sorted(conteos)}")
+        sys.exit(1)
+    print(f"✅ Siempre {conteos.pop()} sentencia(s) SQL por petición")
+finally:
+    borrar_datos(usuarios)
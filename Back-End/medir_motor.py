@@ -0,0 +1,121 @@
+# medir_motor.py
+# Benchmark de concurrencia del engine: lectores (catálogo + un GROUP BY de pedidos) y
+# escritores (pedido + items + stock + email en la outbox) en paralelo durante unos segundos.
+# Sin DATABASE_URL compara, cada una en su propio proceso y BD SQLite temporal, la
+# configuración anterior (rollback journal, pool chico, sin mmap) con la actual.
+# Con DATABASE_URL exportado mide solo ese motor (crea sus datos de prueba y los borra al final).
+#
+#   python medir_motor.py [segundos] [lectores] [escritores]
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+SEGUNDOS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+LECTORES = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+ESCRITORES = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+MARCA = "medir.motor@chocomania.cl"
+
+# Variables de entorno de cada configuración SQLite (las lee main.py al importarse)
+CONFIGURACIONES = {
+    "anterior": {"SQLITE_WAL": "false", "DB_POOL_TAMANO": "5", "DB_POOL_EXTRA": "10",
+                 "SQLITE_MMAP_BYTES": "0", "SQLITE_CACHE_KB": "2000"},
+    "actual": {},
+}
+
+def comparar():
+    """Corre cada configuración en un proceso nuevo: el engine se arma al importar main."""
+    fallidas = []
+    for nombre, variables in CONFIGURACIONES.items():
+        carpeta = tempfile.mkdtemp(prefix="medir_motor_")
+        entorno = {**os.environ, **variables, "MEDIR_MOTOR_CONFIG": nombre,
+                   "DATABASE_URL": f"sqlite:///{os.path.join(carpeta, 'motor.db')}"}
+        proceso = subprocess.run([sys.executable, __file__, *sys.argv[1:]], env=entorno)
+        if proceso.returncode != 0:
+            fallidas.append(nombre)
+    return fallidas
+
+def medir(nombre: str) -> bool:
+    from sqlalchemy import func
+    from main import SessionLocal, UsuarioDB, ProductoDB, PedidoDB, EmailOutboxDB, EstadoPedido, Roles, pedido_items_tabla
+    from migraciones import actualizar
+
+    actualizar()
+    with SessionLocal() as db:
+        usuario = UsuarioDB(email=MARCA, hashed_password="-", rol=Roles.cliente)
+        productos = [ProductoDB(nombre=f"Medir motor {i}", precio=1000, tipo="Prueba", stock=10**6, activo=True) for i in range(20)]
+        db.add(usuario)
+        db.add_all(productos)
+        db.commit()
+        usuario_id, ids = usuario.id, [p.id for p in productos]
+
+    fin = perf_counter() + SEGUNDOS
+    lecturas, escrituras, errores = [], [], []
+
+    def lector():
+        while perf_counter() < fin:
+            inicio = perf_counter()
+            try:
+                with SessionLocal() as db:
+                    db.query(ProductoDB).filter(ProductoDB.activo == True).all()
+                    db.query(PedidoDB.estado, func.count(PedidoDB.id)).group_by(PedidoDB.estado).all()
+                lecturas.append(perf_counter() - inicio)
+            except Exception as e:
+                errores.append(type(e).__name__)
+
+    def escritor():
+        while perf_counter() < fin:
+            inicio = perf_counter()
+            try:
+                with SessionLocal() as db:
+                    pedido = PedidoDB(usuario_id=usuario_id, total=3000, estado=EstadoPedido.pagado)
+                    db.add(pedido)
+                    db.flush()
+                    db.execute(pedido_items_tabla.insert(), [
+                        {"pedido_id": pedido.id, "producto_id": pid, "cantidad": 1, "precio_en_el_momento": 1000} for pid in ids[:3]
+                    ])
+                    db.query(ProductoDB).filter(ProductoDB.id.in_(ids[:3])).update(
+                        {ProductoDB.stock: ProductoDB.stock - 1}, synchronize_session=False
+                    )
+                    db.add(EmailOutboxDB(destinatario=MARCA, asunto="Medir motor", cuerpo_html="x" * 3000))
+                    db.commit()
+                escrituras.append(perf_counter() - inicio)
+            except Exception as e:
+                errores.append(type(e).__name__)
+
+    hilos = [threading.Thread(target=lector) for _ in range(LECTORES)] + [threading.Thread(target=escritor) for _ in range(ESCRITORES)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    def p99(latencias: list) -> float:
+        return sorted(latencias)[max(int(len(latencias) * 0.99) - 1, 0)] * 1000 if latencias else float("nan")
+    print(f"   {nombre:<9} | lecturas/s {len(lecturas) / SEGUNDOS:7.0f} (p99 {p99(lecturas):6.1f} ms)"
+          f" | escrituras/s {len(escrituras) / SEGUNDOS:6.0f} (p99 {p99(escrituras):6.1f} ms)"
+          f" | errores: {len(errores)} {sorted(set(errores)) if errores else ''}")
+
+    with SessionLocal() as db:
+        pedidos = db.query(PedidoDB.id).filter(PedidoDB.usuario_id == usuario_id).scalar_subquery()
+        db.execute(pedido_items_tabla.delete().where(pedido_items_tabla.c.pedido_id.in_(pedidos)))
+        db.query(PedidoDB).filter(PedidoDB.usuario_id == usuario_id).delete(synchronize_session=False)
+        db.query(EmailOutboxDB).filter(EmailOutboxDB.destinatario == MARCA).delete(synchronize_session=False)
+        db.query(ProductoDB).filter(ProductoDB.id.in_(ids)).delete(synchronize_session=False)
+        db.query(UsuarioDB).filter(UsuarioDB.id == usuario_id).delete(synchronize_session=False)
+        db.commit()
+    return not errores
+
+if __name__ == "__main__":
+    if "MEDIR_MOTOR_CONFIG" in os.environ:  # proceso hijo de comparar()
+        sys.exit(0 if medir(os.environ["MEDIR_MOTOR_CONFIG"]) else 1)
+    print(f"🧪 {LECTORES} lectores y {ESCRITORES} escritores durante {SEGUNDOS:g} s...")
+    if "DATABASE_URL" in os.environ:
+        fallidas = [] if medir("DATABASE_URL") else ["DATABASE_URL"]
+    else:
+        fallidas = comparar()
+    if fallidas:
+        print(f"❌ Hubo errores (ej: base de datos bloqueada) en: {', '.join(fallidas)}")
+        sys.exit(1)
+    print("✅ Sin errores de bloqueo")
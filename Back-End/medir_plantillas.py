@@ -0,0 +1,98 @@
+# medir_plantillas.py
+# Microbenchmark del correo de confirmación: cuántas sentencias SQL hace datos_email_pedido
+# (debe ser 1, sin importar cuántos items tenga el pedido) y cuánto cuesta renderizar
+# con la plantilla ya compilada versus cargarla y compilarla en cada correo.
+# Por defecto usa una BD SQLite temporal; con DATABASE_URL exportado corre contra
+# ese motor (crea sus propios datos de prueba y los borra al final).
+#
+#   python medir_plantillas.py [renders] [items_del_pedido]
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+if "DATABASE_URL" not in os.environ:
+    carpeta = tempfile.mkdtemp(prefix="medir_plantillas_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(carpeta, 'plantillas.db')}"
+
+from sqlalchemy import event
+
+from main import (
+    engine, SessionLocal, UsuarioDB, ProductoDB, PedidoDB, Roles, EstadoPedido, pedido_items_tabla,
+    PlantillasEmail, DIRECTORIO_PLANTILLAS, plantillas_email, datos_email_pedido, nombre_visible,
+)
+from migraciones import actualizar
+
+RENDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ITEMS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+MARCA = "medir.plantillas@chocomania.cl"
+
+def crear_datos() -> tuple:
+    """Cliente, productos y un pedido pagado con ITEMS productos. Devuelve (usuario_id, pedido_id)."""
+    with SessionLocal() as db:
+        usuario = UsuarioDB(email=MARCA, hashed_password="-", rol=Roles.cliente, nombre="Cliente Prueba",
+                            direccion="Av. Siempre Viva 742", telefono="123")
+        productos = [ProductoDB(nombre=f"Medir plantillas {i}", precio=1000 + i, tipo="Prueba", stock=10, activo=True) for i in range(ITEMS)]
+        db.add(usuario)
+        db.add_all(productos)
+        db.flush()
+        pedido = PedidoDB(usuario_id=usuario.id, total=sum(p.precio for p in productos), estado=EstadoPedido.pagado)
+        db.add(pedido)
+        db.flush()
+        db.execute(pedido_items_tabla.insert(), [
+            {"pedido_id": pedido.id, "producto_id": p.id, "cantidad": 1, "precio_en_el_momento": p.precio} for p in productos
+        ])
+        db.commit()
+        return usuario.id, pedido.id
+
+def borrar_datos(usuario_id: int, pedido_id: int):
+    with SessionLocal() as db:
+        db.execute(pedido_items_tabla.delete().where(pedido_items_tabla.c.pedido_id == pedido_id))
+        db.query(PedidoDB).filter(PedidoDB.id == pedido_id).delete(synchronize_session=False)
+        db.query(ProductoDB).filter(ProductoDB.nombre.like("Medir plantillas %")).delete(synchronize_session=False)
+        db.query(UsuarioDB).filter(UsuarioDB.id == usuario_id).delete(synchronize_session=False)
+        db.commit()
+
+def contar_sentencias(pedido_id: int) -> tuple:
+    """(sentencias SQL, datos) de una llamada a datos_email_pedido."""
+    sentencias = []
+    contar = lambda *args, **kwargs: sentencias.append(args[2])
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        with SessionLocal() as db:
+            datos = datos_email_pedido(db, pedido_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    return len(sentencias), datos
+
+def microsegundos_por_email(renderizar, veces: int) -> float:
+    inicio = perf_counter()
+    for _ in range(veces):
+        renderizar()
+    return (perf_counter() - inicio) / veces * 1e6
+
+actualizar()
+usuario_id, pedido_id = crear_datos()
+try:
+    print(f"🧪 Correo de confirmación de un pedido con {ITEMS} items...")
+    sentencias, datos = contar_sentencias(pedido_id)
+    nombre_cliente = nombre_visible(datos["cliente"]["nombre"], datos["cliente"]["email"])
+    print(f"   datos_email_pedido: {sentencias} sentencia(s) SQL, {len(datos['items'])} items")
+
+    plantillas_email.cargar()
+    compilada = microsegundos_por_email(
+        lambda: plantillas_email.renderizar("confirmacion_pedido.html", nombre_cliente=nombre_cliente, **datos), RENDERS
+    )
+    # Lo que costaría sin la caché: un entorno nuevo que lee y compila la plantilla en cada correo
+    sin_cache = microsegundos_por_email(
+        lambda: PlantillasEmail(DIRECTORIO_PLANTILLAS).renderizar("confirmacion_pedido.html", nombre_cliente=nombre_cliente, **datos),
+        max(RENDERS // 10, 1)
+    )
+    print(f"   plantilla compilada una vez:     {compilada:8.1f} µs/email")
+    print(f"   cargando y compilando cada vez:  {sin_cache:8.1f} µs/email ({sin_cache / compilada:.0f}x)")
+    if sentencias != 1:
+        print(f"❌ datos_email_pedido hizo {sentencias} sentencias SQL (se esperaba 1)")
+        sys.exit(1)
+    print("✅ Una sola sentencia SQL por correo y la plantilla se compila una sola vez")
+finally:
+    borrar_datos(usuario_id, pedido_id)
@@ -0,0 +1,436 @@
+# migraciones.py
+# Migraciones versionadas del esquema (al estilo Alembic, sin dependencias extra).
+# Cada migración corre en su propia transacción y deja registro en 'schema_version';
+# la app solo compara la versión al arrancar, no hace DDL.
+#
+#   python migraciones.py              -> aplica las migraciones pendientes
+#   python migraciones.py estado       -> muestra la versión de la BD y la del código
+#   python migraciones.py verificar    -> falla (exit 1) si alguna consulta caliente hace SCAN
+#                                         (en una BD en memoria armada con las migraciones; no toca la real)
+#
+# Las migraciones son idempotentes (revisan lo que ya existe), así una BD creada
+# antes de este sistema, sin 'schema_version', se pone al día sin errores.
+# No usan los modelos de main.py: cada una lleva su DDL congelado, así aplicarlas
+# sobre una BD vieja da siempre el mismo resultado aunque los modelos sigan cambiando.
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Tuple
+
+import pytz
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Boolean, Float, DateTime, Date, ForeignKey,
+    LargeBinary, Enum as SAEnum, bindparam, select, inspect, text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, with_parent
+
+from main import (
+    engine, crear_engine, ES_SQLITE, RESERVA_TTL_SEG, Roles,
+    UsuarioDB, PedidoDB, ProductoDB, PromocionDB, CarritoDB, CarritoItemDB,
+    PAGINA_TAMANO_DEFECTO, CAMPANA_TAMANO_BLOQUE, RESERVAS_TAMANO_LOTE, OUTBOX_TAMANO_LOTE, EXPORTACION_TAMANO_BLOQUE,
+    consulta_pagina, consulta_pedidos_de_usuario, consulta_pedido_de_usuario, consulta_pedidos_sin_asignar,
+    consulta_pendientes_despacho, consulta_promociones_vigentes, consulta_item_carrito, consulta_documento_de_pedido,
+    consulta_bloque_exportacion, consulta_notificaciones_de_pedido, consulta_usuarios, consulta_suscriptores,
+    consulta_reservas_vencidas, consulta_pedidos_activos, consulta_outbox_pendientes,
+)
+
+MIGRACIONES: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migracion(version: int, nombre: str):
+    """Registra una migración. Las versiones van en orden y sin saltos."""
+    def registrar(funcion: Callable[[Connection], None]):
+        assert version == len(MIGRACIONES) + 1, f"Migración {version} fuera de orden"
+        MIGRACIONES.append((version, nombre, funcion))
+        return funcion
+    return registrar
+
+
+def version_codigo() -> int:
+    return MIGRACIONES[-1][0]
+
+
+def version_bd(conn: Connection) -> int:
+    """Versión aplicada en la BD (0 si nunca se migró). Es la única consulta que hace la app al arrancar."""
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+# --- Utilidades para escribir migraciones idempotentes ---
+def crear_tablas(conn: Connection, *tablas: Table):
+    """CREATE TABLE (con sus índices) de las tablas congeladas que aún no existen."""
+    ESQUEMA.create_all(bind=conn, tables=list(tablas), checkfirst=True)
+
+
+def crear_indice(conn: Connection, nombre: str, tabla: str, *columnas: str, unico: bool = False):
+    """CREATE INDEX, solo si no existe un índice con ese nombre."""
+    if nombre not in {indice["name"] for indice in inspect(conn).get_indexes(tabla)}:
+        lista = ", ".join(f'"{columna}"' for columna in columnas)
+        conn.execute(text(f"CREATE {'UNIQUE ' if unico else ''}INDEX {nombre} ON {tabla} ({lista})"))
+
+
+def agregar_columna(conn: Connection, tabla: str, columna: str, tipo_sql: str):
+    """ALTER TABLE ... ADD COLUMN, solo si la columna no existe."""
+    if columna not in {c["name"] for c in inspect(conn).get_columns(tabla)}:
+        conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo_sql}"))
+
+
+# --- ESQUEMA CONGELADO ---
+# Copia de las tablas tal como las crea cada migración. NO se actualiza cuando cambian
+# los modelos: un cambio de esquema nuevo va en una migración nueva, con su propio DDL.
+ESQUEMA = MetaData()
+
+# v1: las tablas que existían al introducir las migraciones (antes las creaba create_all).
+# Solo los índices de columna de entonces; los de consultas calientes los agrega la v2.
+usuarios_v1 = Table("usuarios", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("hashed_password", String),
+    Column("rol", SAEnum("cliente", "administrador", "cocinero", "repartidor", name="roles")),
+    Column("nombre", String),
+    Column("direccion", String),
+    Column("comuna", String),
+    Column("telefono", String),
+    Column("recibirPromos", Boolean),
+)
+productos_v1 = Table("productos", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String, index=True),
+    Column("descripcion", String),
+    Column("precio", Float),
+    Column("tipo", String),
+    Column("stock", Integer),
+    Column("activo", Boolean),
+)
+pedidos_v1 = Table("pedidos", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("usuario_id", Integer, ForeignKey("usuarios.id")),
+    Column("total", Float),
+    Column("estado", SAEnum("pendiente_de_pago", "pagado", "en_preparacion", "despachado", "entregado",
+                            "rechazado", "cancelado", name="estadopedido")),
+    Column("fecha_creacion", DateTime(timezone=True)),
+)
+pedido_items_v1 = Table("pedido_items", ESQUEMA,
+    Column("pedido_id", Integer, ForeignKey("pedidos.id"), primary_key=True),
+    Column("producto_id", Integer, ForeignKey("productos.id"), primary_key=True),
+    Column("cantidad", Integer),
+    Column("precio_en_el_momento", Float),
+)
+notificaciones_v1 = Table("notificaciones", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("pedido_id", Integer, ForeignKey("pedidos.id")),
+    Column("tipo", SAEnum("pedido_recibido", "pedido_despachado", "retraso_entrega", name="tiponotificacion")),
+    Column("mensaje", String),
+    Column("hora_estimada", String),
+    Column("fecha_envio", DateTime(timezone=True)),
+)
+seguimientos_v1 = Table("seguimientos", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("pedido_id", Integer, ForeignKey("pedidos.id"), unique=True),
+    Column("estado", SAEnum("en_camino", "entregado", "problema_reportado", name="estadoseguimiento")),
+    Column("hora_estimada_llegada", String),
+    Column("repartidor_asignado", String),
+    Column("lat", Float),
+    Column("lng", Float),
+)
+documentos_v1 = Table("documentos", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("pedido_id", Integer, ForeignKey("pedidos.id")),
+    Column("fecha", DateTime(timezone=True)),
+    Column("tipo", SAEnum("boleta", "factura", name="tipodocumento")),
+    Column("total", Float),
+    Column("rut", String),
+    Column("razon_social", String),
+)
+promociones_v1 = Table("promociones", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("producto_id", Integer, ForeignKey("productos.id")),
+    Column("precio_oferta", Float),
+    Column("fecha_inicio", DateTime(timezone=True)),
+    Column("fecha_termino", DateTime(timezone=True)),
+    Column("activo", Boolean),
+)
+carritos_v1 = Table("carritos", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("usuario_id", Integer, ForeignKey("usuarios.id"), unique=True),
+)
+carrito_items_v1 = Table("carrito_items", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("carrito_id", Integer, ForeignKey("carritos.id")),
+    Column("producto_id", Integer, ForeignKey("productos.id")),
+    Column("cantidad", Integer),
+)
+email_outbox_v1 = Table("email_outbox", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("destinatario", String),
+    Column("asunto", String),
+    Column("cuerpo_html", String),
+    Column("estado", SAEnum("pendiente", "enviando", "enviado", "fallido", name="estadoemail"), index=True),
+    Column("intentos", Integer),
+    Column("proximo_intento", DateTime(timezone=True)),
+    Column("ultimo_error", String),
+    Column("lote", String, index=True),
+    Column("fecha_creacion", DateTime(timezone=True)),
+    Column("fecha_envio", DateTime(timezone=True)),
+)
+email_adjuntos_v1 = Table("email_adjuntos", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email_id", Integer, ForeignKey("email_outbox.id"), index=True),
+    Column("nombre", String),
+    Column("tipo_mime", String),
+    Column("contenido", LargeBinary),
+)
+campanas_v1 = Table("campanas", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("promocion_id", Integer, ForeignKey("promociones.id")),
+    Column("asunto", String),
+    Column("cuerpo_html", String),
+    Column("estado", SAEnum("en_curso", "completada", "cancelada", name="estadocampaña"), index=True),
+    Column("total_destinatarios", Integer),
+    Column("ultimo_usuario_id", Integer),
+    Column("enviados", Integer),
+    Column("fallidos", Integer),
+    Column("fecha_creacion", DateTime(timezone=True)),
+    Column("fecha_fin", DateTime(timezone=True)),
+)
+trabajos_documento_v1 = Table("trabajos_documento", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("pedido_id", Integer, ForeignKey("pedidos.id"), index=True),
+    Column("estado", SAEnum("pendiente", "procesando", "completado", "fallido", name="estadotrabajo"), index=True),
+    Column("intentos", Integer),
+    Column("ultimo_error", String),
+    Column("fecha_creacion", DateTime(timezone=True)),
+    Column("fecha_fin", DateTime(timezone=True)),
+)
+
+# v4
+tramos_recorrido_v4 = Table("tramos_recorrido", ESQUEMA,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("pedido_id", Integer, ForeignKey("pedidos.id"), index=True),
+    Column("desde", DateTime(timezone=True)),
+    Column("cantidad_puntos", Integer),
+    Column("puntos", LargeBinary),
+)
+
+# v5
+ventas_por_hora_v5 = Table("ventas_por_hora", ESQUEMA,
+    Column("dia", Date, primary_key=True),
+    Column("hora", Integer, primary_key=True),
+    Column("pedidos", Integer),
+    Column("total", Float),
+)
+ventas_por_producto_v5 = Table("ventas_por_producto", ESQUEMA,
+    Column("dia", Date, primary_key=True),
+    Column("producto_id", Integer, ForeignKey("productos.id"), primary_key=True),
+    Column("unidades", Integer),
+    Column("total", Float),
+)
+
+
+# --- MIGRACIONES ---
+@migracion(1, "esquema inicial")
+def _esquema_inicial(conn: Connection):
+    crear_tablas(conn,
+        usuarios_v1, productos_v1, pedidos_v1, pedido_items_v1, notificaciones_v1, seguimientos_v1,
+        documentos_v1, promociones_v1, carritos_v1, carrito_items_v1, email_outbox_v1, email_adjuntos_v1,
+        campanas_v1, trabajos_documento_v1,
+    )
+
+
+@migracion(2, "índices de consultas calientes")
+def _indices_consultas_calientes(conn: Connection):
+    crear_indice(conn, "ix_usuarios_rol_id", "usuarios", "rol", "id")
+    crear_indice(conn, "ix_usuarios_promos_id", "usuarios", "recibirPromos", "id")
+    crear_indice(conn, "ix_pedidos_usuario_fecha", "pedidos", "usuario_id", "fecha_creacion", "id")
+    crear_indice(conn, "ix_pedidos_estado_fecha", "pedidos", "estado", "fecha_creacion", "id")
+    crear_indice(conn, "ix_notificaciones_pedido_id", "notificaciones", "pedido_id")
+    crear_indice(conn, "ix_seguimientos_repartidor_asignado", "seguimientos", "repartidor_asignado")
+    crear_indice(conn, "ix_documentos_pedido_id", "documentos", "pedido_id")
+    crear_indice(conn, "ix_documentos_fecha", "documentos", "fecha")
+    crear_indice(conn, "ix_promociones_producto_id", "promociones", "producto_id")
+    crear_indice(conn, "ix_promociones_activo_termino", "promociones", "activo", "fecha_termino")
+    crear_indice(conn, "ix_carrito_items_producto_id", "carrito_items", "producto_id")
+    crear_indice(conn, "ix_carrito_items_carrito_producto", "carrito_items", "carrito_id", "producto_id")
+    crear_indice(conn, "ix_email_outbox_cola", "email_outbox", "estado", "proximo_intento")
+    if ES_SQLITE:
+        # Sin estadísticas el planificador de SQLite puede preferir un SCAN
+        conn.execute(text("ANALYZE"))
+
+
+@migracion(3, "vencimiento de reservas de stock")
+def _vencimiento_reservas(conn: Connection):
+    agregar_columna(conn, "pedidos", "reserva_expira_en", "TIMESTAMP")
+    crear_indice(conn, "ix_pedidos_estado_reserva", "pedidos", "estado", "reserva_expira_en")
+    # Los pedidos que ya esperaban pago reciben el plazo completo desde ahora
+    conn.execute(
+        text(
+            "UPDATE pedidos SET reserva_expira_en = :expira "
+            "WHERE estado = 'pendiente_de_pago' AND reserva_expira_en IS NULL"
+        ).bindparams(bindparam("expira", type_=DateTime(timezone=True))),
+        {"expira": datetime.now(timezone.utc) + timedelta(seconds=RESERVA_TTL_SEG)}
+    )
+
+
+@migracion(4, "historial de recorridos GPS")
+def _historial_recorridos(conn: Connection):
+    crear_tablas(conn, tramos_recorrido_v4)
+
+
+@migracion(5, "rollups de ventas del dashboard")
+def _rollups_ventas(conn: Connection):
+    crear_tablas(conn, ventas_por_hora_v5, ventas_por_producto_v5)
+    # Backfill con los pedidos ya pagados: ventas por día/hora de Chile según la creación del pedido
+    zona = pytz.timezone("America/Santiago")
+    con_venta = ["pagado", "en_preparacion", "despachado", "entregado"]
+    conn.execute(ventas_por_hora_v5.delete())
+    conn.execute(ventas_por_producto_v5.delete())
+    dia_de_pedido = {}
+    por_hora = defaultdict(lambda: [0, 0.0])
+    for pedido_id, total, creado in conn.execute(
+        select(pedidos_v1.c.id, pedidos_v1.c.total, pedidos_v1.c.fecha_creacion).where(pedidos_v1.c.estado.in_(con_venta))
+    ):
+        creado = creado.replace(tzinfo=timezone.utc) if creado.tzinfo is None else creado
+        local = creado.astimezone(zona)
+        dia_de_pedido[pedido_id] = local.date()
+        acumulado = por_hora[(local.date(), local.hour)]
+        acumulado[0] += 1
+        acumulado[1] += total or 0.0
+    por_producto = defaultdict(lambda: [0, 0.0])
+    for pedido_id, producto_id, cantidad, precio in conn.execute(
+        select(pedido_items_v1.c.pedido_id, pedido_items_v1.c.producto_id, pedido_items_v1.c.cantidad,
+               pedido_items_v1.c.precio_en_el_momento).join(pedidos_v1, pedidos_v1.c.id == pedido_items_v1.c.pedido_id)
+        .where(pedidos_v1.c.estado.in_(con_venta))
+    ):
+        acumulado = por_producto[(dia_de_pedido[pedido_id], producto_id)]
+        acumulado[0] += cantidad
+        acumulado[1] += cantidad * (precio or 0.0)
+    if por_hora:
+        conn.execute(ventas_por_hora_v5.insert(), [
+            {"dia": dia, "hora": hora, "pedidos": n, "total": total} for (dia, hora), (n, total) in por_hora.items()
+        ])
+    if por_producto:
+        conn.execute(ventas_por_producto_v5.insert(), [
+            {"dia": dia, "producto_id": producto_id, "unidades": n, "total": total}
+            for (dia, producto_id), (n, total) in por_producto.items()
+        ])
+
+
+@migracion(6, "versión de tokens por usuario")
+def _version_tokens(conn: Connection):
+    agregar_columna(conn, "usuarios", "version_token", "INTEGER NOT NULL DEFAULT 0")
+
+
+def actualizar(motor: Engine = engine) -> List[str]:
+    """Aplica las migraciones pendientes, cada una en su transacción. Devuelve las aplicadas."""
+    with motor.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version "
+            "(version INTEGER PRIMARY KEY, nombre VARCHAR NOT NULL, aplicada_en VARCHAR NOT NULL)"
+        ))
+    aplicadas = []
+    for version, nombre, funcion in MIGRACIONES:
+        with motor.begin() as conn:
+            if version <= version_bd(conn):
+                continue
+            funcion(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, nombre, aplicada_en) VALUES (:v, :n, :f)"),
+                {"v": version, "n": nombre, "f": datetime.now(timezone.utc).isoformat()}
+            )
+        aplicadas.append(f"{version:04d} {nombre}")
+    return aplicadas
+
+
+# --- VERIFICACIÓN DE PLANES (EXPLAIN QUERY PLAN sobre una BD SQLite en memoria) ---
+def consultas_calientes(db: Session) -> list:
+    """
+    (descripción, tabla que no debe recorrerse entera, consulta) de las rutas más usadas.
+    Las consultas salen de los mismos constructores que usan los endpoints (con valores
+    de ejemplo), así el chequeo no se desfasa si cambia un filtro o un join.
+    """
+    ahora = datetime.now(timezone.utc)
+    return [
+        ("mis pedidos (paginado)", "pedidos",
+         consulta_pagina(consulta_pedidos_de_usuario(db, 1), [PedidoDB.fecha_creacion, PedidoDB.id], [ahora, 1],
+                         PAGINA_TAMANO_DEFECTO + 1, descendente=True)),
+        ("pedido de un usuario", "pedidos", consulta_pedido_de_usuario(db, 1, 1)),
+        ("pedidos sin asignar", "pedidos",
+         consulta_pagina(consulta_pedidos_sin_asignar(db), [PedidoDB.fecha_creacion, PedidoDB.id], [ahora, 1],
+                         PAGINA_TAMANO_DEFECTO + 1)),
+        ("pendientes de despacho", "pedidos", consulta_pendientes_despacho(db)),
+        ("despacho de un repartidor", "seguimientos", consulta_pendientes_despacho(db, "rep")),
+        ("promociones vigentes", "promociones", consulta_promociones_vigentes(db, ahora)),
+        # Cargas perezosas de relaciones (lo que emite SQLAlchemy al leer producto.promocion_activa, etc.)
+        ("promociones de un producto", "promociones",
+         select(PromocionDB).where(with_parent(ProductoDB(id=1), ProductoDB.promocion_activa))),
+        ("items del carrito", "carrito_items",
+         select(CarritoItemDB).where(with_parent(CarritoDB(id=1), CarritoDB.items))),
+        ("carritos con un producto", "carrito_items",
+         select(CarritoItemDB).where(with_parent(ProductoDB(id=1), ProductoDB.items_carrito))),
+        ("item de un producto en el carrito", "carrito_items", consulta_item_carrito(db, 1, 1)),
+        ("documento de un pedido", "documentos", consulta_documento_de_pedido(db, 1)),
+        ("exportación de documentos", "documentos",
+         consulta_bloque_exportacion(db, ahora, ahora, 0, EXPORTACION_TAMANO_BLOQUE)),
+        ("notificaciones de un pedido", "notificaciones", consulta_notificaciones_de_pedido(db, 1)),
+        ("usuarios por rol", "usuarios",
+         consulta_pagina(consulta_usuarios(db, Roles.cliente), [UsuarioDB.id], [0], PAGINA_TAMANO_DEFECTO + 1)),
+        ("suscriptores de campañas", "usuarios", consulta_suscriptores(db, 0, CAMPANA_TAMANO_BLOQUE)),
+        ("reservas vencidas", "pedidos", consulta_reservas_vencidas(db, ahora, RESERVAS_TAMANO_LOTE)),
+        ("tablero de pedidos activos", "pedidos", consulta_pedidos_activos(db)),
+        ("cola del outbox", "email_outbox", consulta_outbox_pendientes(db, ahora, OUTBOX_TAMANO_LOTE)),
+    ]
+
+
+def verificar_planes() -> list:
+    """
+    Corre EXPLAIN QUERY PLAN sobre cada consulta caliente. Devuelve las que recorren la tabla entera.
+    Usa una BD en memoria armada con las migraciones y sin estadísticas (sqlite_stat1): con las
+    de una BD real el planificador prefiere un SCAN si la tabla es chica, y el resultado
+    dependería de los datos en vez de los índices.
+    """
+    motor = crear_engine("sqlite://")
+    actualizar(motor)
+    problemas = []
+    with Session(bind=motor) as db:
+        conn = db.connection()
+        if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").first():
+            conn.exec_driver_sql("DELETE FROM sqlite_stat1")
+            conn.exec_driver_sql("ANALYZE sqlite_master")  # recarga las estadísticas (ahora vacías)
+        for descripcion, tabla, consulta in consultas_calientes(db):
+            consulta = getattr(consulta, "statement", consulta)  # Query del ORM -> Select
+            compilada = consulta.compile(dialect=motor.dialect, compile_kwargs={"render_postcompile": True})
+            parametros = tuple(None for _ in compilada.positiontup or ())
+            plan = [fila[-1] for fila in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compilada}", parametros)]
+            scan = [paso for paso in plan if paso.startswith(f"SCAN {tabla}")]
+            print(f"{'❌' if scan else '✅'} {descripcion}: {' | '.join(plan)}")
+            if scan:
+                problemas.append(descripcion)
+    return problemas
+
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else "actualizar"
+
+    if comando == "estado":
+        with engine.connect() as conn:
+            print(f"🗂️ Esquema de la BD: v{version_bd(conn)} | código: v{version_codigo()}")
+        sys.exit(0)
+
+    if comando == "verificar":
+        problemas = verificar_planes()
+        if problemas:
+            print(f"❌ {len(problemas)} consulta(s) recorren la tabla completa: {', '.join(problemas)}")
+            sys.exit(1)
+        print("✅ Todas las consultas calientes usan índices")
+        sys.exit(0)
+
+    if comando != "actualizar":
+        print(f"❌ Comando desconocido '{comando}' (usa: actualizar, estado, verificar)")
+        sys.exit(2)
+
+    aplicadas = actualizar()
+    for nombre in aplicadas:
+        print(f"✅ Migración aplicada: {nombre}")
+    print(f"🗂️ Esquema en v{version_codigo()}" + ("" if aplicadas else " (ya estaba al día)"))
@@ -0,0 +1,20 @@
+# reconstruir_ventas.py
+# Recalcula desde cero los rollups del dashboard de ventas (ventas_por_hora y
+# ventas_por_producto). Normalmente se mantienen solos al pagar/cancelar pedidos;
+# esto es para backfills o si se cargaron pedidos directo en la BD.
+#
+#   python reconstruir_ventas.py
+from main import SessionLocal, reconstruir_ventas
+
+db = SessionLocal()
+try:
+    print("📊 Reconstruyendo rollups de ventas...")
+    pedidos = reconstruir_ventas(db)
+    db.commit()
+    print(f"✅ Rollups reconstruidos con {pedidos} pedidos pagados")
+except Exception as e:
+    db.rollback()
+    print(f"❌ Error: {e}")
+    raise
+finally:
+    db.close()
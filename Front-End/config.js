@@ -10,6 +10,26 @@ function getAuthHeaders() {
     };
 }
 
+// Listados paginados: sigue el header X-Next-Cursor hasta la última página y
+// devuelve una sola respuesta con todas las filas (si una página falla, devuelve esa respuesta)
+async function fetchTodasLasPaginas(url, opciones = {}) {
+    let filas = [];
+    let cursor = null;
+    do {
+        const separador = url.includes('?') ? '&' : '?';
+        const response = await fetch(cursor ? `${url}${separador}cursor=${encodeURIComponent(cursor)}` : url, opciones);
+        if (!response.ok) {
+            return response;
+        }
+        filas = filas.concat(await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return new Response(JSON.stringify(filas), {
+        status: 200,
+        headers: { 'Content-Type': 'application/json' }
+    });
+}
+
 // Función para guardar token después de login
 function saveToken(token) {
     localStorage.setItem('token', token);